@@ -1,14 +1,22 @@
 import os
 import sys
+import atexit
+import queue
+import threading
+import itertools
+import functools
 from pybit.unified_trading import HTTP
+from pybit.exceptions import FailedRequestError
 from dotenv import load_dotenv
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
-import numpy as np
 from loguru import logger 
 from supabase import create_client
-import pandas as pd
 
 
 # === Settings ===
@@ -30,40 +38,230 @@ USD_TYPE = STABLECOIN_LIST[0] # Initial primary stablecoin (e.g., USDT)
 # --- Constants ---
 BUFFER_MULTIPLIER = 1.015 # buffer to cover conversion fees/slippage
 MIN_REDEMPTION_USD = 10.0 # minimum redemption amount from Flexible Saving
+# transient failures worth retrying on read-only Bybit calls
+RETRYABLE_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, FailedRequestError)
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504) # FailedRequestError statuses that are transient (not e.g. 403 IP ban)
+
+# --- Telegram HTTP session (pooled connection reused across notifications) ---
+_TG_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage" if TELEGRAM_BOT_TOKEN else None
+_TG_ENABLED = bool(_TG_URL and TELEGRAM_CHAT_ID)
+_TG_PAYLOAD = {'chat_id': TELEGRAM_CHAT_ID, 'text': None, 'parse_mode': 'Markdown'} # only 'text' changes; used by _tg_worker alone
+_TG_SESSION = requests.Session()
+_TG_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_TG_SESSION.headers['Content-Type'] = 'application/json' # payloads are pre-serialized with orjson
+_tg_queue = queue.Queue()
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+_REPORT_LINES = [] # non-critical notifications of the current run, sent together by send_report()
+_REPORT_LOCK = threading.Lock()
+
+_SESSION = None # Bybit HTTP session, created on first use by get_session() and reused across runs
+
+_SUPABASE_CLIENT = None # created on first use, then reused for every table call
+
+_PENDING_TRADES = [] # trade rows buffered by log_trade until flush_trades()
+_PENDING_TRADES_LOCK = threading.Lock()
+
+_ORDER_LINK_COUNTER = itertools.count(1) # keeps orderLinkIds unique when calls share a run timestamp
+
+_PRODUCT_ID_CACHE = {} # (category, coin) -> Earn productId, static for the life of the process
+_PRODUCT_ID_LOCK = threading.Lock()
 
 
 # --- Utility Functions (Telegram, Balance, Convert, Log, Stake/Redeem, Allocation) ---
+def _tg_worker():
+    """Background worker: delivers queued Telegram messages in order."""
+    while True:
+        _TG_PAYLOAD['text'] = _tg_queue.get()
+        try:
+            _TG_SESSION.post(_TG_URL, data=orjson.dumps(_TG_PAYLOAD), timeout=5)
+        except Exception as e:
+            logger.error(f"Telegram error: {e}")
+        finally:
+            _tg_queue.task_done()
+
+
+def _flush_telegram():
+    """Blocks until every queued Telegram message has been delivered."""
+    _tg_queue.join()
+
+
+threading.Thread(target=_tg_worker, daemon=True).start()
+atexit.register(_flush_telegram)
+
+
 def send_telegram(message):
-    """Sends a notification message to the configured Telegram chat."""
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        'chat_id': TELEGRAM_CHAT_ID,
-        'text': message,
-        'parse_mode': 'Markdown'
-    }
-    try:
-        if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
-            requests.post(url, data=payload)
+    """Queues a notification message for the configured Telegram chat (non-blocking)."""
+    if _TG_ENABLED:
+        _tg_queue.put(message)
+    else:
+        logger.warning("Telegram not configured (missing token/chat ID).")
+
+
+def report(message):
+    """Adds a non-critical notification to the current run's report (sent by send_report)."""
+    with _REPORT_LOCK:
+        _REPORT_LINES.append(message)
+
+
+def send_report():
+    """Sends the collected run report as few Telegram messages as the length limit allows, then clears it."""
+    with _REPORT_LOCK:
+        lines = list(_REPORT_LINES)
+        _REPORT_LINES.clear()
+
+    chunk = ''
+    for line in lines:
+        line = line[:TELEGRAM_MAX_MESSAGE_LENGTH]
+        if chunk and len(chunk) + 1 + len(line) > TELEGRAM_MAX_MESSAGE_LENGTH:
+            send_telegram(chunk)
+            chunk = line
         else:
-            logger.warning("Telegram not configured (missing token/chat ID).")
-    except Exception as e:
-        logger.error(f"Telegram error: {e}")
+            chunk = f"{chunk}\n{line}" if chunk else line
+    if chunk:
+        send_telegram(chunk)
+
+
+def _is_transient(e):
+    """True for network errors and FailedRequestErrors whose HTTP status is worth retrying."""
+    if isinstance(e, FailedRequestError):
+        return getattr(e, 'status_code', None) in RETRYABLE_STATUS_CODES
+    return True
+
+
+def retry(tries=3, delay=1, backoff=2, exceptions=RETRYABLE_EXCEPTIONS):
+    """Decorator: retries an idempotent call on transient errors, waiting delay * backoff**n between tries."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            wait = delay
+            for attempt in range(1, tries + 1):
+                try:
+                    return func(*args, **kwargs)
+                except exceptions as e:
+                    if attempt == tries or not _is_transient(e):
+                        raise
+                    logger.warning(f"{func.__name__} failed ({e}). Retrying in {wait}s ({attempt}/{tries - 1})...")
+                    time.sleep(wait)
+                    wait *= backoff
+        return wrapper
+    return decorator
+
+
+# Read-only Bybit calls, safe to retry (mutating calls like convert/stake are never retried)
+@retry()
+def _get_wallet_balance(session, **kwargs):
+    return session.get_wallet_balance(**kwargs)
+
+
+@retry()
+def _get_staked_position(session, **kwargs):
+    return session.get_staked_position(**kwargs)
+
+
+@retry()
+def _get_earn_product_info(session, **kwargs):
+    return session.get_earn_product_info(**kwargs)
+
+
+def _parse_coin_balance(balances):
+    """Extracts the walletBalance from a single-coin get_wallet_balance response (0.0 if absent)."""
+    if balances['result']['list'] and balances['result']['list'][0]['coin']:
+        available_balance = balances['result']['list'][0]['coin'][0]['walletBalance']
+        return round(float(available_balance), 6)
+    return 0.0
 
 
 def get_coin_balance(session, coin, account_type='UNIFIED'):
     """Retrieves the available wallet balance for a specific coin."""
     try:
-        balances = session.get_wallet_balance(accountType=account_type, coin=coin)
-        if balances['result']['list'] and balances['result']['list'][0]['coin']:
-            available_balance = balances['result']['list'][0]['coin'][0]['walletBalance']
-            return round(float(available_balance), 6)
-        return 0.0 
+        balances = _get_wallet_balance(session, accountType=account_type, coin=coin)
+        return _parse_coin_balance(balances)
     except Exception as e:
         logger.error(f"Error getting {coin} balance: {e}")
         send_telegram(f"❌ Error getting {coin} balance: {e}")
         return 0.0
 
 
+def wait_for_balance_change(session, coin, baseline, expected_delta, timeout=15):
+    """
+    Polls the UNIFIED balance of coin with exponential backoff until it reflects expected_delta
+    over baseline (within 1%) or timeout (s) elapses. Returns the last balance seen (baseline if none).
+    Each poll is a single request: no retries and no Telegram alert, so the timeout holds.
+    """
+    deadline = time.monotonic() + timeout
+    target = baseline + expected_delta * 0.99
+    balance = baseline
+    attempt = 0
+    while True:
+        try:
+            balance = _parse_coin_balance(session.get_wallet_balance(accountType='UNIFIED', coin=coin))
+        except Exception as e:
+            logger.warning(f"Error polling {coin} balance: {e}")
+        if balance >= target or time.monotonic() >= deadline:
+            return balance
+        time.sleep(min(0.5 * 1.5 ** attempt, max(deadline - time.monotonic(), 0)))
+        attempt += 1
+
+
+def get_all_balances(session, account_type='UNIFIED'):
+    """Retrieves the wallet balance of every coin in one request, as {coin: balance}."""
+    try:
+        balances = _get_wallet_balance(session, accountType=account_type)
+        if balances['result']['list']:
+            return {
+                c['coin']: round(float(c['walletBalance'] or 0.0), 6)
+                for c in balances['result']['list'][0]['coin']
+            }
+        return {}
+    except Exception as e:
+        logger.error(f"Error getting wallet balances: {e}")
+        send_telegram(f"❌ Error getting wallet balances: {e}")
+        return {}
+
+
+def fetch_all_flexible_positions(session):
+    """Returns {coin: redeemable amount} for every Flexible Saving position, in one request."""
+    try:
+        staked_info = _get_staked_position(session, category='FlexibleSaving')
+        positions = {}
+        for position in staked_info['result']['list']:
+            # Use 'redeemableAmount' or fallback to 'amount'; keep the first position per coin
+            positions.setdefault(
+                position['coin'],
+                float(position.get('redeemableAmount') or position.get('amount', 0.0))
+            )
+        return positions
+    except Exception as e:
+        logger.warning(f"Error checking Flexible Saving positions: {e}")
+        return {}
+
+
+def prefetch_state(session):
+    """
+    Fetches UNIFIED wallet balances and Flexible Saving redeemable amounts concurrently.
+    Returns (balances, redeemable), both {coin: amount} dicts.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        balances_future = executor.submit(get_all_balances, session, 'UNIFIED')
+        redeemable_future = executor.submit(fetch_all_flexible_positions, session)
+        return balances_future.result(), redeemable_future.result()
+
+
+def _request_quote(session, fromCoin, toCoin, accountType, usd_amount):
+    """Requests a Convert quote for usd_amount of fromCoin and returns the quote's 'result' dict."""
+    request_a_quote = session.request_a_quote(
+        fromCoin=fromCoin, toCoin=toCoin, accountType=accountType,
+        requestCoin=fromCoin, requestAmount=str(usd_amount)
+    )
+    return request_a_quote['result']
+
+
+def _confirm_quote(session, quote):
+    """Confirms (executes) a quote previously returned by _request_quote."""
+    session.confirm_a_quote(quoteTxId=quote['quoteTxId'])
+
+
 def convert_coins(fromCoin, toCoin, accountType, usd_amount, session):
     """
     Executes a market buy equivalent using the Bybit Convert API.
@@ -75,23 +273,19 @@ def convert_coins(fromCoin, toCoin, accountType, usd_amount, session):
              logger.warning(f"Conversion amount {usd_amount:.6f} is too small. Skipping conversion.")
              return (fromCoin, toCoin, "0.0", "0.0")
 
-        request_a_quote = session.request_a_quote(
-            fromCoin=fromCoin, toCoin=toCoin, accountType=accountType,
-            requestCoin=fromCoin, requestAmount=str(usd_amount)
-        )
+        quote = _request_quote(session, fromCoin, toCoin, accountType, usd_amount)
         
-        quote_toCoin = request_a_quote['result']['toCoin']
-        quote_fromCoin = request_a_quote['result']['fromCoin']
-        quote_fromAmount = request_a_quote['result']['fromAmount']
-        quote_toAmount = request_a_quote['result']['toAmount']
+        quote_toCoin = quote['toCoin']
+        quote_fromCoin = quote['fromCoin']
+        quote_fromAmount = quote['fromAmount']
+        quote_toAmount = quote['toAmount']
 
-        quote_id = request_a_quote['result']['quoteTxId']
-        session.confirm_a_quote(quoteTxId=quote_id)
+        _confirm_quote(session, quote)
         
         msg = (f'Processed quote: {quote_fromAmount} {quote_fromCoin} ---> '
                f'{quote_toAmount} {quote_toCoin}')
         logger.info(msg) 
-        send_telegram(f'✅ {msg}')
+        report(f'✅ {msg}')
 
         return (quote_fromCoin, quote_toCoin, quote_fromAmount, quote_toAmount)
     except Exception as e:
@@ -101,29 +295,58 @@ def convert_coins(fromCoin, toCoin, accountType, usd_amount, session):
         return (fromCoin, toCoin, "0.0", "0.0") 
 
 
-def log_trade(symbol, quantity, price, total_usd):
-    """Logs the trade details into the 'trade_log' table."""
+def get_supabase_client():
+    """Returns the shared Supabase client, creating it on first use."""
+    global _SUPABASE_CLIENT
+    if _SUPABASE_CLIENT is None:
+        _SUPABASE_CLIENT = create_client(os.getenv('TABLE_URL'), os.getenv('TABLE_PASSWORD'))
+    return _SUPABASE_CLIENT
 
-    table_url = os.getenv('TABLE_URL')
-    table_key = os.getenv('TABLE_PASSWORD')
-    supabase_client = create_client(table_url, table_key)
-    trade_id = f"{symbol}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+
+def log_trade(symbol, quantity, price, total_usd, ts=None):
+    """Buffers the trade details for the 'trade_log' table (written by flush_trades).
+    ts is the run's datetime shared by all trades of a run; defaults to now."""
+
+    now = ts or datetime.now()
+    trade_id = f"{symbol}-{now:%Y%m%d%H%M%S}"
     
     data = {
         'trade_id': trade_id,
-        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'timestamp': now.isoformat(sep=' ', timespec='seconds'),
         'symbol': symbol,
         'quantity': quantity,
         'price': price,
         'total_usd': total_usd
     }
-    supabase_client.table('trade_log').insert(data).execute()
-    
+    with _PENDING_TRADES_LOCK:
+        _PENDING_TRADES.append(data)
+
+
+def flush_trades():
+    """Writes all buffered trades into the 'trade_log' table in a single insert."""
+    with _PENDING_TRADES_LOCK:
+        rows = list(_PENDING_TRADES)
+        _PENDING_TRADES.clear()
+    if not rows:
+        return
+
+    try:
+        get_supabase_client().table('trade_log').insert(rows).execute()
+    except Exception as e:
+        # Keep the rows so the atexit flush (or the next run in a long-lived process) retries them
+        with _PENDING_TRADES_LOCK:
+            _PENDING_TRADES[:0] = rows
+        logger.error(f"Error writing {len(rows)} trade(s) to trade_log: {e}")
+        send_telegram(f"❌ Error writing {len(rows)} trade(s) to trade_log: {e}")
+
+
+atexit.register(flush_trades)
+
 
 def calculate_PnL(session, from_date=None, to_date=None):
-    table_url = os.getenv('TABLE_URL')
-    table_key = os.getenv('TABLE_PASSWORD')
-    supabase_client = create_client(table_url, table_key)
+    import pandas as pd # imported lazily: only PnL reporting needs pandas
+
+    supabase_client = get_supabase_client()
     
     data = supabase_client.table('trade_log').select('*').execute()
     trades = pd.DataFrame(data.data)
@@ -143,11 +366,19 @@ def calculate_PnL(session, from_date=None, to_date=None):
     else:
         to_date = datetime.now().strftime('%Y-%m-%d')
     
-    for symbol in trades['symbol'].unique():
-        symbol_trades = trades[trades['symbol'] == symbol]
-        total_invested = trades.loc[trades['symbol'] == symbol, 'total_usd'].sum()
-        total_quantity = symbol_trades['quantity'].sum()
-        current_symbol_price = float(session.get_tickers(category='spot', symbol=f'{symbol}USDT')['result']['list'][0]['lastPrice'])
+    # One aggregation pass and one ticker request for all symbols
+    totals = trades.groupby('symbol', sort=False)[['quantity', 'total_usd']].sum()
+    tickers = session.get_tickers(category='spot')['result']['list']
+    last_prices = {t['symbol']: float(t['lastPrice']) for t in tickers}
+
+    for row in totals.itertuples():
+        symbol = row.Index
+        total_invested = row.total_usd
+        total_quantity = row.quantity
+        current_symbol_price = last_prices.get(f'{symbol}USDT')
+        if current_symbol_price is None:
+            logger.warning(f"No spot ticker found for {symbol}USDT. Skipping PnL for {symbol}.")
+            continue
         current_value = total_quantity * current_symbol_price
         pnl = current_value - total_invested
         status_emoji = "🟢" if pnl >= 0 else "🔴"
@@ -159,20 +390,36 @@ def calculate_PnL(session, from_date=None, to_date=None):
                       f"{status_emoji}PnL: ${pnl:.2f}")
 
 
-def stake_or_redeem(session, category, order_type, account_type, amount, coin):
-    """Performs staking or redemption using the Bybit Earn API."""
+def get_product_id(session, category, coin):
+    """Returns the Earn productId for (category, coin), cached per process. None if not found."""
+    key = (category, coin)
+    with _PRODUCT_ID_LOCK:
+        if key in _PRODUCT_ID_CACHE:
+            return _PRODUCT_ID_CACHE[key]
+
+    productIdInfo = _get_earn_product_info(session, category=category, coin=coin)
+    if not productIdInfo['result']['list']:
+        return None
+
+    productId = productIdInfo['result']['list'][0]['productId']
+    with _PRODUCT_ID_LOCK:
+        _PRODUCT_ID_CACHE[key] = productId
+    return productId
+
+
+def stake_or_redeem(session, category, order_type, account_type, amount, coin, ts=None):
+    """Performs staking or redemption using the Bybit Earn API. ts is the run's datetime (defaults to now)."""
 
     # round to 4 decimal places 
     rounded_amount = round(amount, 4) 
     
-    productIdInfo = session.get_earn_product_info(category=category, coin=coin)
-    if not productIdInfo['result']['list']:
+    productId = get_product_id(session, category, coin)
+    if productId is None:
         logger.warning(f"Product ID not found for {coin} in {category}. Skipping {order_type}.")
         send_telegram(f"❗ Product ID not found for {coin} in {category}. Skipping {order_type}.")
         return False 
         
-    productId = productIdInfo['result']['list'][0]['productId']
-    orderLinkId = f"{order_type.lower()}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    orderLinkId = f"{order_type.lower()}-{(ts or datetime.now()):%Y%m%d%H%M%S}-{next(_ORDER_LINK_COUNTER)}"
     try:
         response = session.stake_or_redeem(
             category=category, orderType=order_type, accountType=account_type,
@@ -181,7 +428,7 @@ def stake_or_redeem(session, category, order_type, account_type, amount, coin):
         )
         if response and response['retCode'] == 0:
             logger.info(f"✅ {order_type} {rounded_amount} {coin} successfully.")
-            send_telegram(f"✅ {order_type} {rounded_amount:.6f} {coin} successfully.")
+            report(f"✅ {order_type} {rounded_amount:.6f} {coin} successfully.")
             return True 
         else:
             ret_msg = response.get('retMsg', 'Unknown error')
@@ -189,6 +436,10 @@ def stake_or_redeem(session, category, order_type, account_type, amount, coin):
             send_telegram(f"❌ Error during stake/redeem: {ret_msg}")
             return False
     except Exception as e:
+        if 'productId' in str(e):
+            # Cached productId may be stale; look it up again on the next attempt
+            with _PRODUCT_ID_LOCK:
+                _PRODUCT_ID_CACHE.pop((category, coin), None)
         logger.error(f"Error during stake/redeem: {e}")
         send_telegram(f"❌ Error during stake/redeem: {e}")
         return False
@@ -222,43 +473,71 @@ def get_crypto_allocation():
     return crypto_allocation
 
 
+# Parsed once at import: the allocation and DAILY_USD never change within a process
+CRYPTO_ALLOCATION = get_crypto_allocation()
+USD_AMOUNTS = {symbol: multiplier * DAILY_USD for symbol, multiplier in CRYPTO_ALLOCATION.items()}
+USD_AMOUNT_NEEDED = sum(USD_AMOUNTS.values())
+
+
 # === Main process ===
+def buy_symbol(session, symbol, buy_amount_usd, ts=None):
+    """Buys one symbol via Convert and logs the trade."""
+    logger.info(f"Buying {symbol} with {buy_amount_usd:.2f} {USD_TYPE}...")
+    report(f"🤖 Buying {symbol} with {buy_amount_usd:.2f} {USD_TYPE}...")
+    order = convert_coins(
+        fromCoin=USD_TYPE,
+        toCoin=symbol,
+        accountType='eb_convert_uta',
+        usd_amount=buy_amount_usd,
+        session=session
+        )
+    
+    if float(order[3]) > 0:
+        log_trade(
+            symbol=f"{order[1]}{order[0]}",
+            quantity=order[3],
+            price=float(order[2])/float(order[3]) if float(order[3]) != 0 else 0,
+            total_usd=order[2],
+            ts=ts
+        )
+
+
 def run_dca_bot(session):
-    """The core DCA logic: checks balance, redeems if needed, converts if needed, and executes buys."""
+    """
+    The core DCA logic: checks balance, redeems if needed, converts if needed, and executes buys.
+    Progress notifications are collected and sent as one Telegram report at the end; errors are sent immediately.
+    """
+    try:
+        _run_dca_bot(session)
+    finally:
+        send_report()
+
+
+def _run_dca_bot(session):
+    """Runs the DCA steps for run_dca_bot."""
     global USD_TYPE
-    logger.info(f"[{datetime.now()}] Starting DCA bot")
-    send_telegram("🤖 Daily DCA bot is now running...")
+    run_ts = datetime.now() # one timestamp shared by every trade and Earn order of this run
+    logger.info(f"[{run_ts}] Starting DCA bot")
+    report("🤖 Daily DCA bot is now running...")
     
-    crypto_allocation = get_crypto_allocation()
-    if not crypto_allocation:
+    if not CRYPTO_ALLOCATION:
         return 
     
-    usd_amount_needed = np.sum(list(crypto_allocation.values())) * DAILY_USD
-    
     # --- 1. Check initial balance of the primary stablecoin (USD_TYPE) ---
-    current_coin_balance = get_coin_balance(session, USD_TYPE, account_type='UNIFIED')
+    # Wallet balances and all Flexible Saving positions are fetched concurrently up front
+    balances, flexible_redeemable = prefetch_state(session)
+    current_coin_balance = balances.get(USD_TYPE, 0.0)
     logger.info(f"Available {USD_TYPE} in Unified Account: {current_coin_balance:.2f}")
 
     final_coin_balance = current_coin_balance
-    amount_to_cover = usd_amount_needed - final_coin_balance
+    amount_to_cover = USD_AMOUNT_NEEDED - final_coin_balance
     
     # --- 2. Attempt redemption of PRIMARY stablecoin (USDT) with BUFFER and MIN_LIMIT ---
     if amount_to_cover > 0: 
         logger.info(f"Deficit found in {USD_TYPE} Unified Account: {amount_to_cover:.2f}. Checking {USD_TYPE} in Flexible Saving.")
         
-        redeemable_amount = 0.0
-        try:
-            staked_info = session.get_staked_position(category='FlexibleSaving', coin=USD_TYPE) 
-            
-            if staked_info['result']['list']:
-                position = staked_info['result']['list'][0]
-                # Use 'redeemableAmount' or fallback to 'amount'
-                redeemable_amount = float(position.get('redeemableAmount') or position.get('amount', 0.0))
-                logger.info(f"Flexible Saving Redeemable {USD_TYPE}: {redeemable_amount:.2f}")
-                
-        except Exception as e:
-            logger.error(f"Error fetching Primary Coin Flexible Saving position: {e}")
-
+        redeemable_amount = flexible_redeemable.get(USD_TYPE, 0.0)
+        logger.info(f"Flexible Saving Redeemable {USD_TYPE}: {redeemable_amount:.2f}")
         
         if redeemable_amount > 0:
             # 2a. Calculate required amount with buffer
@@ -271,35 +550,29 @@ def run_dca_bot(session):
             amount_to_redeem = min(amount_to_redeem, redeemable_amount)
             
             logger.info(f"Attempting to redeem {amount_to_redeem:.6f} {USD_TYPE} from Flexible Saving (Required: {amount_to_cover:.2f})...")
-            send_telegram(f"⏳ Insufficient balance. Attempting to redeem {amount_to_redeem:.2f} {USD_TYPE} from Flexible Saving.")
-
-            if stake_or_redeem(session, category='FlexibleSaving', order_type='Redeem', account_type='UNIFIED', amount=amount_to_redeem, coin=USD_TYPE):
-                time.sleep(7.5) 
+            report(f"⏳ Insufficient balance. Attempting to redeem {amount_to_redeem:.2f} {USD_TYPE} from Flexible Saving.")
 
-        # Re-check balance after primary coin redemption attempt
-        final_coin_balance = get_coin_balance(session, USD_TYPE, account_type='UNIFIED')
-        amount_to_cover = usd_amount_needed - final_coin_balance # Recalculate deficit
+            if stake_or_redeem(session, category='FlexibleSaving', order_type='Redeem', account_type='UNIFIED', amount=amount_to_redeem, coin=USD_TYPE, ts=run_ts):
+                # Wait until the redeemed funds land instead of a fixed sleep; the poll yields the new balance
+                final_coin_balance = wait_for_balance_change(session, USD_TYPE, final_coin_balance, amount_to_redeem)
+                amount_to_cover = USD_AMOUNT_NEEDED - final_coin_balance # Recalculate deficit
 
     # --- 3. Cover remaining deficit using SECONDARY stablecoins from Flexible Saving (with BUFFER and MIN_LIMIT) ---
     if amount_to_cover > 0:
         logger.info(f"Deficit of {amount_to_cover:.2f} {USD_TYPE} remains. Checking secondary stablecoin Flexible Savings.")
         
-        # Iterate over secondary stablecoins (e.g., USDC)
-        for stablecoin in STABLECOIN_LIST:
-            if stablecoin == USD_TYPE:
-                continue
+        # Iterate over secondary stablecoins (e.g., USDC), largest Flexible Saving position first
+        secondary_coins = sorted(
+            (c for c in STABLECOIN_LIST if c != USD_TYPE),
+            key=lambda c: -flexible_redeemable.get(c, 0.0)
+        )
+        for stablecoin in secondary_coins:
+            if amount_to_cover <= 0:
+                break # Deficit already covered
             
             # --- 3a. Check redeemable amount of secondary stablecoin from Flexible Saving ---
-            secondary_redeemable = 0.0
-            try:
-                staked_info = session.get_staked_position(category='FlexibleSaving', coin=stablecoin) 
-                if staked_info['result']['list']:
-                    position = staked_info['result']['list'][0]
-                    secondary_redeemable = float(position.get('redeemableAmount') or position.get('amount', 0.0))
-                    logger.info(f"Flexible Saving Redeemable {stablecoin}: {secondary_redeemable:.2f}")
-            except Exception as e:
-                logger.warning(f"Error checking {stablecoin} Flexible Saving position: {e}")
-                continue # Skip this coin
+            secondary_redeemable = flexible_redeemable.get(stablecoin, 0.0)
+            logger.info(f"Flexible Saving Redeemable {stablecoin}: {secondary_redeemable:.2f}")
 
             if secondary_redeemable > 0:
                 # 3b. Calculate required amount with buffer (assuming 1:1 conversion rate)
@@ -312,15 +585,16 @@ def run_dca_bot(session):
                 amount_to_redeem = min(amount_to_redeem, secondary_redeemable)
                 
                 logger.info(f"Attempting to redeem {amount_to_redeem:.6f} {stablecoin} for conversion (Required: {amount_to_cover:.2f}, Min Redeem: {MIN_REDEMPTION_USD:.2f}).")
-                send_telegram(f"⏳ Redeeming {amount_to_redeem:.2f} {stablecoin} from Flexible Saving.")
+                report(f"⏳ Redeeming {amount_to_redeem:.2f} {stablecoin} from Flexible Saving.")
 
                 # --- 3e. Redeem the required amount of secondary coin to UTA ---
-                if stake_or_redeem(session, category='FlexibleSaving', order_type='Redeem', account_type='UNIFIED', amount=amount_to_redeem, coin=stablecoin):
-                    time.sleep(5) 
-                    
+                if stake_or_redeem(session, category='FlexibleSaving', order_type='Redeem', account_type='UNIFIED', amount=amount_to_redeem, coin=stablecoin, ts=run_ts):
                     # --- 3f. Convert the redeemed amount on UTA to the PRIMARY coin (USDT) ---
-                    # We convert the ENTIRE amount that was just redeemed (to utilize the buffer).
-                    redeemed_balance_on_uta = get_coin_balance(session, stablecoin, account_type='UNIFIED')
+                    # We convert the ENTIRE amount that was just redeemed (to utilize the buffer),
+                    # polling until it has landed on UTA instead of a fixed sleep.
+                    redeemed_balance_on_uta = wait_for_balance_change(
+                        session, stablecoin, balances.get(stablecoin, 0.0), amount_to_redeem
+                    )
                     conversion_amount = redeemed_balance_on_uta 
                     
                     logger.info(f"Attempting conversion of ALL {conversion_amount:.2f} {stablecoin} to {USD_TYPE}.")
@@ -336,9 +610,9 @@ def run_dca_bot(session):
                     if float(order[3]) > 0.0:
                         logger.info(f"Conversion successful. Gained {float(order[3]):.2f} {USD_TYPE}.")
                         
-                        # Re-check balance and deficit after conversion
-                        final_coin_balance = get_coin_balance(session, USD_TYPE, account_type='UNIFIED')
-                        amount_to_cover = usd_amount_needed - final_coin_balance
+                        # Track the deficit from the confirmed toAmount; step 4 reconciles with the exchange
+                        final_coin_balance += float(order[3])
+                        amount_to_cover = USD_AMOUNT_NEEDED - final_coin_balance
                         
                         if amount_to_cover <= 0:
                             logger.info("Deficit successfully covered by secondary stablecoin conversion.")
@@ -351,45 +625,53 @@ def run_dca_bot(session):
     # --- 4. Final balance check after ALL attempts ---
     final_coin_balance = get_coin_balance(session, USD_TYPE, account_type='UNIFIED')
     
-    if final_coin_balance < usd_amount_needed:
-        logger.error(f"❌ After all attempts, insufficient {USD_TYPE} balance for daily DCA: {final_coin_balance:.2f} < {usd_amount_needed:.2f}. Halting DCA.")
+    if final_coin_balance < USD_AMOUNT_NEEDED:
+        logger.error(f"❌ After all attempts, insufficient {USD_TYPE} balance for daily DCA: {final_coin_balance:.2f} < {USD_AMOUNT_NEEDED:.2f}. Halting DCA.")
         send_telegram(
-            f"❌ After all attempts (Flexible Saving + Conversion), insufficient {USD_TYPE} balance for daily DCA: {final_coin_balance:.2f} < {usd_amount_needed:.2f}. Halting DCA."
+            f"❌ After all attempts (Flexible Saving + Conversion), insufficient {USD_TYPE} balance for daily DCA: {final_coin_balance:.2f} < {USD_AMOUNT_NEEDED:.2f}. Halting DCA."
         )
         return
     
-    # --- 5. Core DCA logic: buying ---
-    for symbol, multiplier in crypto_allocation.items():
-        buy_amount_usd = multiplier * DAILY_USD
-        
+    # --- 5. Core DCA logic: buying (symbols are bought concurrently) ---
+    # Reserve each buy against the balance up front so concurrent buys cannot overspend.
+    buy_amounts = {}
+    for symbol, buy_amount_usd in USD_AMOUNTS.items():
         if final_coin_balance < buy_amount_usd:
             logger.warning(f"Not enough {USD_TYPE} to buy {symbol}. Required {buy_amount_usd:.2f}, available {final_coin_balance:.2f}. Skipping {symbol}.")
             send_telegram(f"❗ Not enough {USD_TYPE} to buy {symbol}. Required {buy_amount_usd:.2f}, available {final_coin_balance:.2f}. Skipping {symbol}.")
             continue 
 
-        logger.info(f"Buying {symbol} with {buy_amount_usd:.2f} {USD_TYPE}...")
-        send_telegram(
-            f"🤖 Buying {symbol} with {buy_amount_usd:.2f} {USD_TYPE}..."
-        )
-        order = convert_coins(
-            fromCoin=USD_TYPE,
-            toCoin=symbol,
-            accountType='eb_convert_uta',
-            usd_amount=buy_amount_usd,
-            session=session
-            )
-        
-        if float(order[3]) > 0:
-            log_trade(
-                symbol=f"{order[1]}{order[0]}",
-                quantity=order[3],
-                price=float(order[2])/float(order[3]) if float(order[3]) != 0 else 0,
-                total_usd=order[2]
-            )
-            
-            final_coin_balance -= float(order[2]) 
-        
-        coin_balance = get_coin_balance(session, symbol, account_type='UNIFIED')
+        buy_amounts[symbol] = buy_amount_usd
+        final_coin_balance -= buy_amount_usd
+
+    if not buy_amounts:
+        return
+
+    with ThreadPoolExecutor(max_workers=len(buy_amounts)) as executor:
+        futures = {
+            executor.submit(buy_symbol, session, symbol, buy_amount_usd, run_ts): symbol
+            for symbol, buy_amount_usd in buy_amounts.items()
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error buying {symbol}: {e}")
+                send_telegram(f"❌ Error buying {symbol}: {e}")
+
+    # Write every trade of this run to trade_log in one request
+    flush_trades()
+
+    # --- 6. Post-buy staking/notifications (only SOL and ETH need a follow-up) ---
+    post_buy_symbols = [symbol for symbol in buy_amounts if symbol in ('SOL', 'ETH')]
+    if not post_buy_symbols:
+        return
+
+    # One balance refresh for all follow-up symbols
+    balances = get_all_balances(session, account_type='UNIFIED')
+    for symbol in post_buy_symbols:
+        coin_balance = balances.get(symbol, 0.0)
         if symbol == 'SOL' and coin_balance >= 0.15:
             logger.info(f"Trying to stake {coin_balance} {symbol} to OnChain Earn...")
             stake_or_redeem(
@@ -398,7 +680,8 @@ def run_dca_bot(session):
                 order_type='Stake',
                 account_type='UNIFIED',
                 amount=coin_balance,
-                coin=symbol
+                coin=symbol,
+                ts=run_ts
             )
         elif symbol == 'ETH' and coin_balance >= 0.01:
             send_telegram(
@@ -406,19 +689,45 @@ def run_dca_bot(session):
             )
 
 
+def get_session():
+    """Returns the shared Bybit HTTP session, creating it on first use."""
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = HTTP(
+            api_key=API_KEY,
+            api_secret=API_SECRET,
+            testnet=False    # True for testnet
+        )
+        # pybit keeps its requests.Session on .client; widen the pool and retry dropped connections
+        client = getattr(_SESSION, 'client', None)
+        if isinstance(client, requests.Session):
+            client.mount('https://', HTTPAdapter(
+                pool_connections=4, pool_maxsize=16,
+                max_retries=Retry(total=2, backoff_factor=0.2)
+            ))
+    return _SESSION
+
+
 def daily_dca():
     """Initializes the session and runs the main DCA bot."""
     if not API_KEY or not API_SECRET:
         logger.error("Error: API_KEY or API_SECRET is missing. Cannot initialize session.")
         return
+
+    # Fail fast on misconfiguration before opening any exchange connection
+    if DAILY_USD <= 0:
+        logger.error(f"Error: DAILY_USD must be > 0 (got {DAILY_USD}). Skipping DCA run.")
+        send_telegram(f"❌ DCA run skipped: DAILY_USD must be > 0 (got {DAILY_USD}).")
+        _flush_telegram()
+        return
+    if not CRYPTO_ALLOCATION:
+        return # already reported by get_crypto_allocation() at import
         
-    session = HTTP(
-        api_key=API_KEY,
-        api_secret=API_SECRET,
-        testnet=False    # True for testnet
-    )
+    session = get_session()
     run_dca_bot(session)
     calculate_PnL(session, from_date=os.getenv('PNL_FROM_DATE'))
+    # Deliver every queued notification before returning (atexit only covers interpreter exit)
+    _flush_telegram()
 
 
 # === Start ===